@@ -1,5 +1,4 @@
 import numpy as np
-import sounddevice as sd
 import queue
 import aubio
 import librosa
@@ -13,9 +12,11 @@ class BPMDetector:
         self.sample_rate = 44100
         self.block_size = 44100  
         self.hop_size = 512  
+        self.stream_block_size = int(self.block_size * 3)  # Frames per audio callback
         self.audio_queue = queue.Queue()
         self.volume_threshold = 0.01
         self.audio_data = None
+        self.recorder = None  # Optional SessionRecorder fed from the callback
         
         # Initialize aubio tempo detection with 'complex' method
         self.tempo = aubio.tempo(
@@ -29,6 +30,11 @@ class BPMDetector:
         """Callback for sounddevice"""
         if status:
             print(status)
+        if self.recorder is not None:
+            try:
+                self.recorder.write(indata)
+            except Exception as e:
+                print(f"Recorder error: {e}")
         self.audio_queue.put_nowait(indata.copy())
 
     def analyze_tempo_aubio(self, audio_data):
@@ -101,6 +107,8 @@ class BPMDetector:
 
     def find_vb_cable(self):
         """Find VB-Cable audio input"""
+        import sounddevice as sd
+
         devices = sd.query_devices()
         for i, device in enumerate(devices):
             if (device['max_input_channels'] > 0 and 
@@ -112,6 +120,8 @@ class BPMDetector:
 
     def setup_audio_stream(self):
         """Setup and return audio stream"""
+        import sounddevice as sd
+
         device_id = self.find_vb_cable()
         device_info = sd.query_devices(device_id if device_id is not None else None, kind='input')
         channels = min(device_info['max_input_channels'], 2)
@@ -120,7 +130,7 @@ class BPMDetector:
             callback=self.audio_callback,
             channels=channels,
             samplerate=self.sample_rate,
-            blocksize=int(self.block_size * 3),
+            blocksize=self.stream_block_size,
             device=device_id
         )
 
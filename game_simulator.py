@@ -0,0 +1,383 @@
+import numpy as np
+import time
+import threading
+import argparse
+import sys
+from typing import Dict, List, Optional, Any, Tuple
+from bpm_detector import BPMDetector
+from gamepad_backend import FakeGamepadBackend
+from movement import Pattern, parse_pattern
+from rpgbot import FF3AudioBot
+from session_recorder import load_session
+
+sys.stdout.reconfigure(line_buffering=True)
+
+
+class Segment:
+    """One scripted stretch of game audio ('field' or 'battle')"""
+
+    def __init__(self, kind: str, duration: float, bpm: Optional[float] = None,
+                 audio: Optional[np.ndarray] = None, amplitude: float = 0.3):
+        if kind not in ('field', 'battle'):
+            raise ValueError(f"Unknown segment kind: {kind}")
+        self.kind = kind
+        self.duration = duration
+        self.bpm = bpm
+        self.audio = audio
+        self.amplitude = amplitude
+
+    @classmethod
+    def from_file(cls, kind: str, path: str, duration: Optional[float] = None,
+                  sample_rate: int = 44100):
+        """Load a recording (looped to fill duration) with soundfile"""
+        import soundfile as sf
+        import librosa
+
+        audio, file_rate = sf.read(path, dtype='float32', always_2d=True)
+        audio = np.mean(audio, axis=1)
+        if file_rate != sample_rate:
+            audio = librosa.resample(audio, orig_sr=file_rate, target_sr=sample_rate)
+        if duration is None:
+            duration = len(audio) / sample_rate
+        return cls(kind, duration, audio=audio)
+
+    def render(self, offset: int, frames: int, sample_rate: int) -> np.ndarray:
+        """Render mono samples [offset, offset + frames) relative to segment start"""
+        n = np.arange(offset, offset + frames)
+        if self.audio is not None:
+            return self.audio[n % len(self.audio)]
+        if not self.bpm:
+            return np.zeros(frames, dtype=np.float32)
+
+        # Click track: a short decaying tone burst on every beat
+        period = sample_rate * 60.0 / self.bpm
+        phase = np.mod(n, period)
+        click_len = int(0.05 * sample_rate)
+        envelope = np.where(phase < click_len, np.exp(-phase / (click_len / 5)), 0.0)
+        tone = np.sin(2 * np.pi * 1000 * n / sample_rate)
+        return (self.amplitude * envelope * tone).astype(np.float32)
+
+
+class SimulatedAudioStream:
+    """Stand-in for sd.InputStream that plays a scripted timeline in real time"""
+
+    def __init__(self, callback, timeline: List[Segment], sample_rate: int,
+                 block_size: int, channels: int = 2):
+        self.callback = callback
+        self.timeline = timeline
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.channels = channels
+        self.start_time = None
+        self.is_running = False
+        self.thread = None
+
+        # Segment boundaries in samples
+        self.boundaries = []
+        position = 0
+        for segment in timeline:
+            length = int(segment.duration * sample_rate)
+            self.boundaries.append((position, position + length, segment))
+            position += length
+        self.total_frames = position
+
+    @property
+    def duration(self):
+        return self.total_frames / self.sample_rate
+
+    def segment_times(self) -> List[Dict[str, Any]]:
+        """Wall-clock start/end of each segment (valid after start())"""
+        return [
+            {
+                'kind': segment.kind,
+                'start': self.start_time + begin / self.sample_rate,
+                'end': self.start_time + end / self.sample_rate,
+            }
+            for begin, end, segment in self.boundaries
+        ]
+
+    def render_block(self, position: int, frames: int) -> np.ndarray:
+        block = np.zeros(frames, dtype=np.float32)
+        for begin, end, segment in self.boundaries:
+            lo = max(begin, position)
+            hi = min(end, position + frames)
+            if lo < hi:
+                block[lo - position:hi - position] = segment.render(lo - begin, hi - lo, self.sample_rate)
+        return np.repeat(block[:, None], self.channels, axis=1)
+
+    def _play(self):
+        position = 0
+        while self.is_running and position < self.total_frames:
+            frames = min(self.block_size, self.total_frames - position)
+            indata = self.render_block(position, frames)
+            position += frames
+
+            # A real input stream delivers a block once it has been captured
+            delay = self.start_time + position / self.sample_rate - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            if not self.is_running:
+                break
+            self.callback(indata, frames, None, None)
+
+    def start(self):
+        self.is_running = True
+        self.start_time = time.time()
+        self.thread = threading.Thread(target=self._play)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+
+
+class GameSimulator:
+    """Runs FF3AudioBot against scripted audio and a fake gamepad"""
+
+    def __init__(self, timeline: List[Segment], target_battles: Optional[int] = None,
+                 movement_pattern: Optional[Pattern] = None):
+        self.timeline = timeline
+        self.target_battles = target_battles
+        self.movement_pattern = movement_pattern
+        self.detections = []
+        self.completions = []
+
+    def run(self) -> Dict[str, Any]:
+        """Play the whole timeline through the bot and return the latency report"""
+        self.detections = []
+        self.completions = []
+        detector = BPMDetector()
+        stream = SimulatedAudioStream(
+            detector.audio_callback,
+            self.timeline,
+            detector.sample_rate,
+            detector.stream_block_size
+        )
+        # Record exploration movement separately from battle/menu macro input
+        gamepad = FakeGamepadBackend()
+        movement_pad = FakeGamepadBackend()
+        bot = FF3AudioBot(
+            self.target_battles,
+            gamepad=gamepad,
+            bpm_detector=detector,
+            audio_stream=stream,
+            watch_keyboard=False,
+            movement_pattern=self.movement_pattern,
+            movement_gamepad=movement_pad,
+            on_battle_start=self.battle_started,
+            on_battle_end=self.battle_ended
+        )
+
+        print(f"Simulating {stream.duration:.0f}s of game audio...")
+        bot_thread = threading.Thread(target=bot.run)
+        bot_thread.daemon = True
+        bot_thread.start()
+        bot_thread.join(timeout=stream.duration + 1.0)
+
+        end_time = time.time()
+        bot.is_running = False
+        stream.stop()
+        bot_thread.join(timeout=1.0)
+
+        return self.build_report(
+            stream.segment_times(),
+            gamepad.presses(),
+            movement_pad.held_intervals(end_time),
+            end_time - stream.start_time
+        )
+
+    def battle_started(self):
+        """Timestamp a detection as the bot enters its battle sequence"""
+        self.detections.append(time.time())
+
+    def battle_ended(self):
+        """Pair the latest detection with the time its sequence returned"""
+        self.completions.append((self.detections[-1], time.time()))
+
+    def build_report(self, segments, presses, movement_holds, elapsed) -> Dict[str, Any]:
+        """Match detections to scripted battles and compute latencies
+
+        movement_holds are (start, end, button) d-pad holds from the movement
+        engine; time they overlap battle music is walking during a battle.
+        """
+        def held_time(start, end):
+            return sum(max(0.0, min(end, hold_end) - max(start, hold_start))
+                       for hold_start, hold_end, _ in movement_holds)
+
+        battles = [s for s in segments if s['kind'] == 'battle']
+        matched = set()
+        encounters = []
+
+        for battle in battles:
+            hits = [t for t in self.detections if battle['start'] <= t < battle['end']]
+            if not hits:
+                held = held_time(battle['start'], battle['end'])
+                encounters.append({
+                    'start': battle['start'],
+                    'detected': False,
+                    'held_in_battle': held,
+                    'held_before_detection': held,
+                })
+                continue
+            # Re-entering battle during the same battle is a false encounter
+            detection = hits[0]
+            matched.add(detection)
+            completion = next((end for start, end in self.completions if start == detection), None)
+            battle_end = battle['end'] if completion is None else completion
+            first_input = next(
+                (t for t, _ in presses if t >= detection),
+                None
+            )
+            encounters.append({
+                'start': battle['start'],
+                'detected': True,
+                'detection_latency': detection - battle['start'],
+                'input_latency': None if first_input is None else first_input - battle['start'],
+                'completed': completion is not None,
+                'held_in_battle': held_time(battle['start'], battle_end),
+                'held_before_detection': held_time(battle['start'], detection),
+            })
+
+        detection_latencies = [e['detection_latency'] for e in encounters if e['detected']]
+        input_latencies = [e['input_latency'] for e in encounters
+                           if e['detected'] and e['input_latency'] is not None]
+        # Only real battles whose sequence finished count towards throughput
+        completed_battles = len([e for e in encounters if e['detected'] and e['completed']])
+
+        return {
+            'elapsed': elapsed,
+            'scripted_battles': len(battles),
+            'detected_battles': len(detection_latencies),
+            'missed_encounters': len(battles) - len(detection_latencies),
+            'false_encounters': len([t for t in self.detections if t not in matched]),
+            'completed_battles': completed_battles,
+            'battles_per_hour': completed_battles / elapsed * 3600 if elapsed > 0 else 0.0,
+            'mean_detection_latency': float(np.mean(detection_latencies)) if detection_latencies else None,
+            'mean_input_latency': float(np.mean(input_latencies)) if input_latencies else None,
+            'max_input_latency': float(np.max(input_latencies)) if input_latencies else None,
+            'held_in_battle': sum(e['held_in_battle'] for e in encounters),
+            'held_before_detection': sum(e['held_before_detection'] for e in encounters),
+            'encounters': encounters,
+        }
+
+
+def default_timeline(cycles: int, field_duration: float, battle_duration: float,
+                     field_bpm: float, battle_bpm: float) -> List[Segment]:
+    """Alternate field and battle music, ending on field music"""
+    timeline = []
+    for _ in range(cycles):
+        timeline.append(Segment('field', field_duration, bpm=field_bpm))
+        timeline.append(Segment('battle', battle_duration, bpm=battle_bpm))
+    timeline.append(Segment('field', field_duration, bpm=field_bpm))
+    return timeline
+
+
+def timeline_from_session(directory, battle_ranges: List[Tuple[float, float]],
+                          sample_rate: int = 44100) -> List[Segment]:
+    """Turn a SessionRecorder directory into a labelled replay timeline
+
+    battle_ranges are the true (start, end) seconds of battle music from the
+    start of the recording. They are ground truth supplied by whoever reviews
+    the incident. The bot's own detections are not used, so missed and false
+    triggers show up in the report.
+    """
+    audio, _, recorded_rate = load_session(directory)
+    if recorded_rate != sample_rate:
+        raise ValueError(f"Recording is {recorded_rate} Hz, expected {sample_rate} Hz")
+
+    battles = []
+    for start, end in sorted(battle_ranges):
+        start = min(int(start * sample_rate), len(audio))
+        end = min(int(end * sample_rate), len(audio))
+        if end <= start:
+            raise ValueError(f"Empty battle range: {start / sample_rate:.1f}-{end / sample_rate:.1f}s")
+        if battles and start < battles[-1][1]:
+            raise ValueError("Battle ranges overlap")
+        battles.append((start, end))
+
+    timeline = []
+    position = 0
+    for start, end in battles + [(len(audio), len(audio))]:
+        if start > position:
+            timeline.append(Segment('field', (start - position) / sample_rate, audio=audio[position:start]))
+        if end > start:
+            timeline.append(Segment('battle', (end - start) / sample_rate, audio=audio[start:end]))
+        position = end
+    return timeline
+
+
+def print_session_events(directory):
+    """List what the bot logged in a recording, to help pick battle ranges"""
+    _, events, sample_rate = load_session(directory)
+    for event in events:
+        if event['event'] != 'bpm':
+            print(f"  {event['sample'] / sample_rate:8.1f}s  {event['event']}")
+
+
+def parse_range(text: str) -> Tuple[float, float]:
+    start, _, end = text.partition(':')
+    return float(start), float(end)
+
+
+def print_report(report):
+    def fmt(value):
+        return "n/a" if value is None else f"{value:.2f}s"
+
+    print("\n=== Simulation report ===")
+    print(f"Elapsed: {report['elapsed']:.1f}s")
+    print(f"Scripted battles: {report['scripted_battles']}")
+    print(f"Detected battles: {report['detected_battles']}")
+    print(f"Missed encounters: {report['missed_encounters']}")
+    print(f"False encounters: {report['false_encounters']}")
+    print(f"Completed battles: {report['completed_battles']}")
+    print(f"Battles per hour: {report['battles_per_hour']:.1f}")
+    print(f"Mean music-to-detection latency: {fmt(report['mean_detection_latency'])}")
+    print(f"Mean music-to-first-input latency: {fmt(report['mean_input_latency'])}")
+    print(f"Max music-to-first-input latency: {fmt(report['max_input_latency'])}")
+    print(f"D-pad held during battles: {report['held_in_battle']:.2f}s "
+          f"({report['held_before_detection']:.2f}s before detection)")
+    for i, encounter in enumerate(report['encounters'], 1):
+        if encounter['detected']:
+            print(f"  Battle {i}: detected after {fmt(encounter['detection_latency'])}, "
+                  f"first input after {fmt(encounter['input_latency'])}, "
+                  f"d-pad held {fmt(encounter['held_in_battle'])} in battle")
+        else:
+            print(f"  Battle {i}: missed, d-pad held {fmt(encounter['held_in_battle'])} in battle")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless end-to-end benchmark for FF3AudioBot")
+    parser.add_argument('--cycles', type=int, default=3, help="Number of field/battle cycles")
+    parser.add_argument('--field-duration', type=float, default=30.0)
+    # Roughly the bot's battle sequence; longer battle music gets re-detected
+    parser.add_argument('--battle-duration', type=float, default=25.0)
+    parser.add_argument('--field-bpm', type=float, default=120.0)
+    # librosa reads a 170 BPM click track at half tempo (~85), below the battle gate
+    parser.add_argument('--battle-bpm', type=float, default=180.0)
+    parser.add_argument('--field-audio', help="Recording to use for field segments")
+    parser.add_argument('--battle-audio', help="Recording to use for battle segments")
+    parser.add_argument('--recording', help="Replay a session directory written by SessionRecorder instead")
+    parser.add_argument('--battle-range', action='append', default=[], type=parse_range,
+                        help="True battle music START:END in seconds into the recording (repeatable)")
+    # Encounters are scripted, so the pattern only affects d-pad time held in battle
+    parser.add_argument('--pattern', default='back_and_forth',
+                        help="Movement pattern: back_and_forth, square or a path like 'right:3,left:3'")
+    parser.add_argument('--steps', type=int, default=3, help="Steps per leg for named patterns")
+    args = parser.parse_args()
+
+    timeline = default_timeline(args.cycles, args.field_duration, args.battle_duration,
+                                args.field_bpm, args.battle_bpm)
+    if args.recording:
+        print("Events logged by the bot in this recording:")
+        print_session_events(args.recording)
+        if not args.battle_range:
+            print("No --battle-range given: replaying the whole recording as field audio")
+        timeline = timeline_from_session(args.recording, args.battle_range)
+    elif args.field_audio or args.battle_audio:
+        for i, segment in enumerate(timeline):
+            path = args.field_audio if segment.kind == 'field' else args.battle_audio
+            if path:
+                timeline[i] = Segment.from_file(segment.kind, path, segment.duration)
+
+    pattern = parse_pattern(args.pattern, args.steps)
+    print_report(GameSimulator(timeline, movement_pattern=pattern).run())
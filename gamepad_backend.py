@@ -0,0 +1,121 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+# Button names used by FF3AudioBot, mapped to vgamepad XUSB_BUTTON attribute names
+BUTTON_NAMES = {
+    'A': 'XUSB_GAMEPAD_A',
+    'B': 'XUSB_GAMEPAD_B',
+    'X': 'XUSB_GAMEPAD_X',
+    'Y': 'XUSB_GAMEPAD_Y',
+    'START': 'XUSB_GAMEPAD_START',
+    'BACK': 'XUSB_GAMEPAD_BACK',
+    'DPAD_UP': 'XUSB_GAMEPAD_DPAD_UP',
+    'DPAD_DOWN': 'XUSB_GAMEPAD_DPAD_DOWN',
+    'DPAD_LEFT': 'XUSB_GAMEPAD_DPAD_LEFT',
+    'DPAD_RIGHT': 'XUSB_GAMEPAD_DPAD_RIGHT',
+}
+
+
+class GamepadBackend(ABC):
+    """Interface the bot uses to send controller input"""
+
+    @abstractmethod
+    def press_button(self, button: str):
+        pass
+
+    @abstractmethod
+    def release_button(self, button: str):
+        pass
+
+    @abstractmethod
+    def update(self):
+        pass
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+
+class VGamepadBackend(GamepadBackend):
+    """Virtual Xbox 360 controller via vgamepad (Windows, ViGEmBus)"""
+
+    def __init__(self):
+        import vgamepad as vg
+
+        self.gamepad = vg.VX360Gamepad()
+        self.buttons = {
+            name: getattr(vg.XUSB_BUTTON, attr)
+            for name, attr in BUTTON_NAMES.items()
+        }
+
+    def _lookup(self, button):
+        if button not in self.buttons:
+            raise ValueError(f"Unknown button: {button}")
+        return self.buttons[button]
+
+    def press_button(self, button: str):
+        self.gamepad.press_button(button=self._lookup(button))
+
+    def release_button(self, button: str):
+        self.gamepad.release_button(button=self._lookup(button))
+
+    def update(self):
+        self.gamepad.update()
+
+    def reset(self):
+        self.gamepad.reset()
+
+
+class FakeGamepadBackend(GamepadBackend):
+    """Records timestamped input events instead of driving a controller"""
+
+    def __init__(self):
+        self.events: List[Tuple[float, str, str]] = []
+        self.held = set()
+        self.lock = threading.Lock()
+
+    def press_button(self, button: str):
+        if button not in BUTTON_NAMES:
+            raise ValueError(f"Unknown button: {button}")
+        with self.lock:
+            self.held.add(button)
+            self.events.append((time.time(), 'press', button))
+
+    def release_button(self, button: str):
+        if button not in BUTTON_NAMES:
+            raise ValueError(f"Unknown button: {button}")
+        with self.lock:
+            self.held.discard(button)
+            self.events.append((time.time(), 'release', button))
+
+    def update(self):
+        pass
+
+    def reset(self):
+        with self.lock:
+            self.held.clear()
+            self.events.append((time.time(), 'reset', ''))
+
+    def held_intervals(self, end_time: float) -> List[Tuple[float, float, str]]:
+        """Return (start, end, button) for every hold; open holds end at end_time"""
+        intervals = []
+        pressed = {}
+        with self.lock:
+            events = list(self.events)
+        for t, action, button in events:
+            if action == 'press':
+                pressed.setdefault(button, t)
+            elif action == 'release' and button in pressed:
+                intervals.append((pressed.pop(button), t, button))
+            elif action == 'reset':
+                intervals.extend((start, t, held) for held, start in pressed.items())
+                pressed.clear()
+        intervals.extend((start, end_time, held) for held, start in pressed.items())
+        return intervals
+
+    def presses(self) -> List[Tuple[float, str]]:
+        """Return (timestamp, button) for every recorded press"""
+        with self.lock:
+            return [(t, button) for t, action, button in self.events if action == 'press']
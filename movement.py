@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import List, Optional, Tuple
+
+DIRECTION_BUTTONS = {
+    'up': 'DPAD_UP',
+    'down': 'DPAD_DOWN',
+    'left': 'DPAD_LEFT',
+    'right': 'DPAD_RIGHT',
+}
+
+# A pattern is a list of legs: (direction, steps to walk before turning)
+Pattern = List[Tuple[str, int]]
+
+
+def validate_pattern(pattern: Pattern) -> Pattern:
+    """Raise ValueError for an empty pattern, unknown direction or empty leg"""
+    if not pattern:
+        raise ValueError("Movement pattern is empty")
+    for direction, steps in pattern:
+        if direction not in DIRECTION_BUTTONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        if steps < 1:
+            raise ValueError(f"Leg must be at least one step: {direction}:{steps}")
+    return pattern
+
+
+def back_and_forth(steps: int, directions: Tuple[str, str] = ('right', 'left')) -> Pattern:
+    """Walk back and forth along one axis"""
+    return [(directions[0], steps), (directions[1], steps)]
+
+
+def square(steps: int) -> Pattern:
+    """Walk a square loop clockwise"""
+    return [('right', steps), ('down', steps), ('left', steps), ('up', steps)]
+
+
+def custom_path(path: str) -> Pattern:
+    """Parse a path like 'right:3,down:2,left:3,up:2'"""
+    pattern = []
+    for leg in path.split(','):
+        direction, _, steps = leg.strip().partition(':')
+        pattern.append((direction.strip(), int(steps) if steps else 1))
+    return validate_pattern(pattern)
+
+
+def parse_pattern(spec: str, steps: int = 3) -> Pattern:
+    """Build a pattern from a name ('back_and_forth', 'square') or a custom path"""
+    if spec == 'back_and_forth':
+        return back_and_forth(steps)
+    if spec == 'square':
+        return square(steps)
+    return custom_path(spec)
+
+
+class MovementEngine:
+    """Holds the D-pad continuously, turning when each leg's step budget is used up"""
+
+    def __init__(self, gamepad, pattern: Pattern, step_time: float = 0.25):
+        validate_pattern(pattern)
+        self.gamepad = gamepad
+        self.pattern = pattern
+        self.step_time = step_time  # Seconds of holding per tile walked
+        self.leg = 0
+        self.leg_end = None
+        self.held_button = None
+        self.halted = False
+        self.lock = threading.Lock()
+
+    def _release(self):
+        if self.held_button is not None:
+            self.gamepad.release_button(self.held_button)
+            self.gamepad.update()
+            self.held_button = None
+
+    def _hold(self, button):
+        if self.held_button == button:
+            return
+        self._release()
+        self.gamepad.press_button(button)
+        self.gamepad.update()
+        self.held_button = button
+
+    def update(self, now: Optional[float] = None):
+        """Keep walking; call regularly from the exploration loop"""
+        now = time.time() if now is None else now
+        with self.lock:
+            if self.halted:
+                return
+            if self.leg_end is None:
+                self.leg_end = now + self.pattern[self.leg][1] * self.step_time
+
+            # Advance from the previous deadline so loop jitter doesn't accumulate
+            while now >= self.leg_end:
+                self.leg = (self.leg + 1) % len(self.pattern)
+                self.leg_end += self.pattern[self.leg][1] * self.step_time
+
+            direction = self.pattern[self.leg][0]
+            self._hold(DIRECTION_BUTTONS[direction])
+
+    def halt(self):
+        """Release the D-pad and ignore updates until resume()"""
+        with self.lock:
+            self.halted = True
+            self._release()
+
+    def resume(self, restart: bool = True):
+        """Allow movement again, optionally from the start of the pattern"""
+        with self.lock:
+            if restart:
+                self.leg = 0
+            self.leg_end = None
+            self.halted = False
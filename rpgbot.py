@@ -1,6 +1,4 @@
 import numpy as np
-import sounddevice as sd
-import pyautogui
 import time
 import queue
 import threading
@@ -9,19 +7,41 @@ import keyboard
 import atexit
 import librosa
 from scipy import signal
-import vgamepad as vg
 import keyboard
 from bpm_detector import BPMDetector
-from typing import Dict, List, Optional, Any
+from gamepad_backend import GamepadBackend, VGamepadBackend
+from movement import MovementEngine, Pattern, back_and_forth, parse_pattern
+from session_recorder import SessionRecorder
+from typing import Callable, Dict, List, Optional, Any
 
 sys.stdout.reconfigure(line_buffering=True)
 
 class FF3AudioBot:
-    def __init__(self, target_battles: Optional[int] = None):
+    def __init__(self, target_battles: Optional[int] = None,
+                 gamepad: Optional[GamepadBackend] = None,
+                 bpm_detector: Optional[BPMDetector] = None,
+                 audio_stream: Optional[Any] = None,
+                 watch_keyboard: bool = True,
+                 movement_pattern: Optional[Pattern] = None,
+                 record_dir: Optional[str] = None,
+                 movement_gamepad: Optional[GamepadBackend] = None,
+                 on_battle_start: Optional[Callable[[], None]] = None,
+                 on_battle_end: Optional[Callable[[], None]] = None):
         # Audio parameters
 
-        self.bpm_detector = BPMDetector()
-        self.audio_stream = self.bpm_detector.setup_audio_stream()
+        self.bpm_detector = bpm_detector if bpm_detector is not None else BPMDetector()
+
+        # Optional rolling recording of the input audio for incident replay
+        self.recorder = None
+        if record_dir is not None:
+            self.recorder = SessionRecorder(record_dir, self.bpm_detector.sample_rate)
+            self.recorder.start()
+            self.bpm_detector.recorder = self.recorder
+            print(f"Recording session audio to {self.recorder.directory}")
+
+        if audio_stream is None:
+            audio_stream = self.bpm_detector.setup_audio_stream()
+        self.audio_stream = audio_stream
         self.audio_stream.start()
 
         self.min_bpm_gate = 142  # Fixed baseline tempo for normal music
@@ -29,12 +49,15 @@ class FF3AudioBot:
         self.current_bpm = None
         #self.tempo_threshold = 25
         
-        try:
-            self.gamepad = vg.VX360Gamepad()
-            print("Virtual Xbox controller created successfully")
-        except Exception as e:
-            print(f"Failed to create virtual controller: {e}")
-            sys.exit(1)
+        if gamepad is not None:
+            self.gamepad = gamepad
+        else:
+            try:
+                self.gamepad = VGamepadBackend()
+                print("Virtual Xbox controller created successfully")
+            except Exception as e:
+                print(f"Failed to create virtual controller: {e}")
+                sys.exit(1)
         
         # Battle timings (in seconds)
         self.battle_first_wait = 12.0
@@ -48,9 +71,17 @@ class FF3AudioBot:
         self.button_cooldown = 0.1
         self.last_button_press = 0
         self.key_duration = 0.1
-        self.direction = 'right'
-        self.steps_taken = 0
         self.steps_per_direction = 3  # Number of steps before changing direction
+        self.step_time = 0.25  # Seconds the d-pad is held per step
+        if movement_pattern is None:
+            movement_pattern = back_and_forth(self.steps_per_direction)
+        if movement_gamepad is None:
+            movement_gamepad = self.gamepad
+        self.movement = MovementEngine(movement_gamepad, movement_pattern, self.step_time)
+
+        # Optional hooks around each battle sequence (used by the simulator)
+        self.on_battle_start = on_battle_start
+        self.on_battle_end = on_battle_end
 
         self.last_battle_end_time = None
         self.battle_cooldown = 2.0  # Seconds to wait after battle before new detection
@@ -65,6 +96,7 @@ class FF3AudioBot:
         self.calibration_time = 10
 
         self.quicksave_on = True
+        self.watch_keyboard = watch_keyboard  # Disable for headless runs (simulator)
 
         self.after_battle_inc = 10
         
@@ -76,6 +108,10 @@ class FF3AudioBot:
         self.is_running = False
         if hasattr(self, 'audio_stream'):
             self.audio_stream.stop()
+        if getattr(self, 'recorder', None) is not None:
+            self.recorder.close()
+        if hasattr(self, 'movement'):
+            self.movement.halt()
         if hasattr(self, 'gamepad'):
             self.gamepad.reset()
             time.sleep(0.1)
@@ -87,53 +123,12 @@ class FF3AudioBot:
             time.sleep(self.button_cooldown) 
 
         try:
-            # Map button names to actions
-            if button == 'A':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
-            elif button == 'B':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_B)
-            elif button == 'X':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_X)
-            elif button == 'Y':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_Y)
-            elif button == 'START':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_START)
-            elif button == 'BACK':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK)
-            elif button == 'DPAD_UP':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP)
-            elif button == 'DPAD_DOWN':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN)
-            elif button == 'DPAD_LEFT':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT)
-            elif button == 'DPAD_RIGHT':
-                self.gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT)
-
+            self.gamepad.press_button(button)
             self.gamepad.update()
             time.sleep(duration)
             
             # Release the button
-            if button == 'A':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
-            elif button == 'B':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_B)
-            elif button == 'X':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_X)
-            elif button == 'Y':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_Y)
-            elif button == 'START':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_START)
-            elif button == 'BACK':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK)
-            elif button == 'DPAD_UP':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP)
-            elif button == 'DPAD_DOWN':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN)
-            elif button == 'DPAD_LEFT':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT)
-            elif button == 'DPAD_RIGHT':
-                self.gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT)
-                
+            self.gamepad.release_button(button)
             self.gamepad.update()
             self.last_button_press = time.time()
             
@@ -141,9 +136,18 @@ class FF3AudioBot:
             print(f"Button press error: {e}")   
 
     
+    def esc_pressed(self):
+        """Check the ESC key, unless keyboard watching is disabled"""
+        return self.watch_keyboard and keyboard.is_pressed('esc')
+
+    def annotate(self, event, **data):
+        """Add an event to the session recording, if one is running"""
+        if self.recorder is not None:
+            self.recorder.annotate(event, **data)
+
     def check_exit_conditions(self):
         """Check if any exit conditions are met"""
-        if keyboard.is_pressed('esc'):
+        if self.esc_pressed():
             print("\nEscape key pressed - stopping bot...")
             self.cleanup()
             sys.exit(0)
@@ -176,6 +180,7 @@ class FF3AudioBot:
             librosa_bpm = current_tempo['librosa']['bpm']
             aubio_bpm = current_tempo['aubio']['bpm']
             self.current_bpm = librosa_bpm
+            self.annotate('bpm', librosa=librosa_bpm, aubio=aubio_bpm)
             if self.last_print_time is None or current_time - self.last_print_time >= 3:
                 print(f"Current tempo Librosa: {current_tempo['librosa']['bpm']:.1f} BPM", flush=True)
                 #print(f"Current tempo Aubio: {current_tempo['aubio']['bpm']:.1f} BPM", flush=True)
@@ -235,6 +240,7 @@ class FF3AudioBot:
             # self.press_button('X')
             
             print("Attacking...", flush=True)
+            self.annotate('attacking')
             time.sleep(self.battle_final_wait)
             self.press_button('A')
             self.press_button('A')
@@ -259,28 +265,20 @@ class FF3AudioBot:
             
             # Reset battle state
             self.in_battle = False
-            self.steps_taken = 0
-            self.direction = 'right'
             
         except Exception as e:
             print(f"Battle sequence error: {e}")
     
     def move_character(self):
-        """Move the character using virtual d-pad"""
+        """Keep the d-pad held along the movement pattern"""
         try:
-            button = 'DPAD_RIGHT' if self.direction == 'right' else 'DPAD_LEFT'
-            self.press_button(button, duration=self.button_cooldown)
-            
-            self.steps_taken += 1
-            if self.steps_taken >= self.steps_per_direction:
-                self.direction = 'left' if self.direction == 'right' else 'right'
-                self.steps_taken = 0
-                
+            self.movement.update()
         except Exception as e:
             print(f"Movement error: {e}")
 
     def after_battle_actions(self):
         """Custom actions for inbetween battles"""
+        self.annotate('after_battle_actions')
         try:
             if self.quicksave_on:
                 time.sleep(3)
@@ -333,12 +331,21 @@ class FF3AudioBot:
                     else:
                         self.last_battle_end_time = None
                         print("Cooldown complete")
+                        self.annotate('cooldown_complete')
                 
                 if self.process_audio() and not self.in_battle:
                     print("Battle music detected!", flush=True)
                     self.in_battle = True
+                    self.movement.halt()  # Never walk during a battle
+                    self.annotate('battle_detected', bpm=self.current_bpm)
+                    if self.on_battle_start is not None:
+                        self.on_battle_start()
                     self.handle_battle()
+                    if self.on_battle_end is not None:
+                        self.on_battle_end()
                     self.in_battle = False
+                    self.annotate('battle_end', battles=self.num_battles)
+                    self.movement.resume()
                     self.last_battle_end_time = time.time()  # Set cooldown time start
                     print("Returning to exploration...", flush=True)
                         
@@ -365,7 +372,7 @@ class FF3AudioBot:
                     self.cleanup()
                     sys.exit(0)
 
-                if keyboard.is_pressed('esc'):
+                if self.esc_pressed():
                     print("\nEscape key pressed - stopping bot...")
                     break
 
@@ -380,6 +387,7 @@ class FF3AudioBot:
             sys.exit(0)
 
 if __name__ == "__main__":
+    import pyautogui
     pyautogui.FAILSAFE = False
 
     print("Starting in 5 seconds...")
@@ -393,8 +401,14 @@ if __name__ == "__main__":
     try:
         target = input("> ").strip()
         target_battles = int(target) if target else None
+        print("\nWhich movement pattern? back_and_forth, square, or a path like right:3,down:2,left:3,up:2")
+        print("(Press Enter for back_and_forth)")
+        pattern = input("> ").strip()
+        movement_pattern = parse_pattern(pattern) if pattern else None
+        print("\nRecord session audio for replay? Enter a directory, or press Enter to skip")
+        record_dir = input("> ").strip() or None
         time.sleep(5)
-        bot = FF3AudioBot(target_battles)
+        bot = FF3AudioBot(target_battles, movement_pattern=movement_pattern, record_dir=record_dir)
         bot.run()
     except Exception as e:
         print(f"Fatal error: {e}")
@@ -0,0 +1,228 @@
+import numpy as np
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+INDEX_FILE = 'index.json'
+ZERO_CHUNK_FRAMES = 1 << 16
+
+
+class SessionRecorder:
+    """Rotating recording of the bot's audio input with a sidecar event index
+
+    Audio is down-mixed to float32 mono straight into pre-sized memory-mapped
+    segment files, so audio_callback only copies samples into memory. A
+    background thread flushes the segments and rewrites the index.
+
+    Each recorder writes a new session_<timestamp> subdirectory of directory,
+    so restarting the bot never overwrites an earlier session.
+
+    The index never lists the segment that will be recycled next, so an
+    index left behind by a killed bot cannot point at overwritten audio.
+    The replayable window is therefore one segment shorter than
+    window_seconds, plus the segment currently being written.
+    """
+
+    def __init__(self, directory, sample_rate: int = 44100,
+                 window_seconds: float = 1800, segment_seconds: float = 60,
+                 flush_interval: float = 5.0):
+        self.directory = self._new_session_directory(Path(directory))
+        self.sample_rate = sample_rate
+        self.segment_frames = int(segment_seconds * sample_rate)
+        self.num_segments = max(2, int(np.ceil(window_seconds / segment_seconds)))
+        self.flush_interval = flush_interval
+
+        # All segment files are allocated, mapped and touched up front so the
+        # callback never faults in new file blocks
+        self.segments = [self._allocate_segment(i) for i in range(self.num_segments)]
+        self.segment_start_sample = np.full(self.num_segments, -1, dtype=np.int64)
+        self.segment_start_time = np.zeros(self.num_segments, dtype=np.float64)
+        self.segment_frames_written = np.zeros(self.num_segments, dtype=np.int64)
+
+        self.current = 0
+        self.position = 0  # Write position inside the current segment
+        self.total_frames = 0
+        self.last_block_time = None
+
+        self.events: List[Dict[str, Any]] = []
+        self.events_lock = threading.Lock()
+        self.segments_lock = threading.Lock()  # Guards the segment_* arrays
+        self.is_running = False
+        self.wake = threading.Event()
+        self.writer_thread = None
+
+    @staticmethod
+    def _new_session_directory(parent):
+        # Never reuse a directory; add a suffix when two sessions share a second
+        parent.mkdir(parents=True, exist_ok=True)
+        base = datetime.now().strftime('session_%Y%m%d_%H%M%S')
+        suffix = 1
+        while True:
+            name = base if suffix == 1 else f"{base}_{suffix}"
+            try:
+                (parent / name).mkdir()
+                return parent / name
+            except FileExistsError:
+                suffix += 1
+
+    @staticmethod
+    def segment_name(index):
+        return f"segment_{index:03d}.f32"
+
+    def _allocate_segment(self, index):
+        path = self.directory / self.segment_name(index)
+        zeros = np.zeros(ZERO_CHUNK_FRAMES, dtype=np.float32)
+        with open(path, 'wb') as f:
+            remaining = self.segment_frames
+            while remaining > 0:
+                n = min(remaining, ZERO_CHUNK_FRAMES)
+                f.write(zeros[:n].tobytes())
+                remaining -= n
+            f.flush()
+            os.fsync(f.fileno())
+
+        segment = np.memmap(path, dtype=np.float32, mode='r+', shape=(self.segment_frames,))
+        segment[:] = 0.0
+        return segment
+
+    def start(self):
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self._writer)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def close(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.wake.set()
+        if self.writer_thread is not None:
+            self.writer_thread.join(timeout=5.0)
+        self.flush()
+
+    def write(self, indata):
+        """Append a (frames, channels) block; safe to call from the audio callback"""
+        frames = len(indata)
+        offset = 0
+        if self.segment_start_sample[self.current] < 0:
+            self._begin_segment(self.current)
+        while offset < frames:
+            n = min(frames - offset, self.segment_frames - self.position)
+            out = self.segments[self.current][self.position:self.position + n]
+            np.mean(indata[offset:offset + n], axis=1, out=out)
+            offset += n
+            with self.segments_lock:
+                self.position += n
+                self.total_frames += n
+                self.segment_frames_written[self.current] = self.position
+                self.last_block_time = time.time()
+            if self.position == self.segment_frames:
+                self._begin_segment((self.current + 1) % self.num_segments)
+
+    def _begin_segment(self, index):
+        # Recycling the oldest segment: mark it empty before overwriting
+        with self.segments_lock:
+            self.current = index
+            self.position = 0
+            self.segment_frames_written[index] = 0
+            self.segment_start_sample[index] = self.total_frames
+            self.segment_start_time[index] = time.time()
+        # Rewrite the index promptly now that the window has moved
+        self.wake.set()
+
+    def annotate(self, event: str, **data):
+        """Record a bot event (detection, BPM reading, battle phase)"""
+        now = time.time()
+        with self.segments_lock:
+            sample = self.total_frames
+            last_block_time = self.last_block_time
+        if last_block_time is not None:
+            sample += int((now - last_block_time) * self.sample_rate)
+        entry = {'time': now, 'sample': sample, 'event': event}
+        entry.update(data)
+        with self.events_lock:
+            self.events.append(entry)
+
+    def _writer(self):
+        while self.is_running:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Session recorder error: {e}")
+
+    def flush(self):
+        """Flush segment data and rewrite the index"""
+        for segment in self.segments:
+            segment.flush()
+
+        # Snapshot the metadata so a segment recycled mid-flush stays consistent
+        with self.segments_lock:
+            frames_written = self.segment_frames_written.copy()
+            start_samples = self.segment_start_sample.copy()
+            start_times = self.segment_start_time.copy()
+            total_frames = self.total_frames
+            next_recycled = (self.current + 1) % self.num_segments
+
+        segments = []
+        for i in range(self.num_segments):
+            frames = int(frames_written[i])
+            if frames == 0 or i == next_recycled:
+                continue
+            segments.append({
+                'file': self.segment_name(i),
+                'start_sample': int(start_samples[i]),
+                'start_time': float(start_times[i]),
+                'frames': frames,
+            })
+        segments.sort(key=lambda s: s['start_sample'])
+
+        # Drop events that fall before the oldest retained audio
+        oldest = segments[0]['start_sample'] if segments else total_frames
+        with self.events_lock:
+            self.events = [e for e in self.events if e['sample'] >= oldest]
+            events = list(self.events)
+
+        index = {
+            'sample_rate': self.sample_rate,
+            'segment_frames': self.segment_frames,
+            'segments': segments,
+            'events': events,
+        }
+        tmp_path = self.directory / (INDEX_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.directory / INDEX_FILE)
+
+
+def load_session(directory) -> Tuple[np.ndarray, List[Dict[str, Any]], int]:
+    """Load a recorded session as (mono audio, events, sample_rate)
+
+    Event 'sample' values are rebased so they index into the returned audio.
+    """
+    directory = Path(directory)
+    with open(directory / INDEX_FILE) as f:
+        index = json.load(f)
+
+    parts = []
+    first_sample = None
+    for segment in index['segments']:
+        data = np.memmap(directory / segment['file'], dtype=np.float32, mode='r',
+                         shape=(index['segment_frames'],))
+        if first_sample is None:
+            first_sample = segment['start_sample']
+        parts.append(np.array(data[:segment['frames']]))
+
+    audio = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    first_sample = first_sample or 0
+    events = []
+    for event in index['events']:
+        event = dict(event)
+        event['sample'] -= first_sample
+        events.append(event)
+    return audio, events, index['sample_rate']
@@ -0,0 +1,53 @@
+import pytest
+from game_simulator import GameSimulator
+
+
+def make_segments():
+    kinds = ['field', 'battle', 'field', 'battle', 'field', 'battle']
+    return [{'kind': kind, 'start': i * 10.0, 'end': (i + 1) * 10.0}
+            for i, kind in enumerate(kinds)]
+
+
+def test_build_report_scores_encounters():
+    simulator = GameSimulator([])
+    # Battle 1 detected and finished, then re-detected while still in battle;
+    # a false trigger on the field; battle 2 missed; battle 3 still running
+    simulator.detections = [13.0, 17.0, 25.0, 53.0]
+    simulator.completions = [(13.0, 19.0), (17.0, 19.5), (25.0, 29.0)]
+    presses = [(13.1, 'X'), (17.1, 'X'), (25.1, 'X'), (53.2, 'X')]
+
+    report = simulator.build_report(make_segments(), presses, [], elapsed=60.0)
+
+    assert report['scripted_battles'] == 3
+    assert report['detected_battles'] == 2
+    assert report['missed_encounters'] == 1
+    assert report['false_encounters'] == 2
+    assert report['completed_battles'] == 1
+    assert report['battles_per_hour'] == pytest.approx(60.0)
+    assert report['mean_detection_latency'] == pytest.approx(3.0)
+
+    first, missed, running = report['encounters']
+    assert first['completed']
+    assert first['input_latency'] == pytest.approx(3.1)
+    assert not missed['detected']
+    assert running['detected'] and not running['completed']
+    assert running['input_latency'] == pytest.approx(3.2)
+
+
+def test_build_report_measures_dpad_held_in_battle():
+    simulator = GameSimulator([])
+    simulator.detections = [13.0]
+    simulator.completions = [(13.0, 19.0)]
+    # Held across the start of battle 1 until the detection halted movement,
+    # then again after the sequence; battle 2 is missed while walking
+    holds = [(8.0, 13.0, 'DPAD_RIGHT'), (19.0, 21.0, 'DPAD_LEFT'), (32.0, 50.0, 'DPAD_UP')]
+    segments = make_segments()[:4]
+
+    report = simulator.build_report(segments, [], holds, elapsed=40.0)
+
+    first, missed = report['encounters']
+    assert first['held_before_detection'] == pytest.approx(3.0)
+    assert first['held_in_battle'] == pytest.approx(3.0)
+    assert missed['held_in_battle'] == pytest.approx(8.0)
+    assert report['held_in_battle'] == pytest.approx(11.0)
+    assert report['held_before_detection'] == pytest.approx(11.0)
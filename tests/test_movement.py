@@ -0,0 +1,70 @@
+import pytest
+from gamepad_backend import FakeGamepadBackend
+from movement import MovementEngine, custom_path, parse_pattern
+
+
+def held_sequence(gamepad):
+    return [(action, button) for _, action, button in gamepad.events]
+
+
+def make_engine(pattern='square', steps=2):
+    gamepad = FakeGamepadBackend()
+    # 2 steps * 0.25s: each leg lasts 0.5s
+    return gamepad, MovementEngine(gamepad, parse_pattern(pattern, steps), step_time=0.25)
+
+
+def test_holds_each_leg_then_turns():
+    gamepad, engine = make_engine()
+    for now in [100.0, 100.1, 100.49]:
+        engine.update(now)
+    assert gamepad.held == {'DPAD_RIGHT'}
+    assert held_sequence(gamepad) == [('press', 'DPAD_RIGHT')]
+
+    engine.update(100.5)
+    assert gamepad.held == {'DPAD_DOWN'}
+    engine.update(101.0)
+    engine.update(101.5)
+    assert gamepad.held == {'DPAD_UP'}
+    engine.update(102.0)
+    assert gamepad.held == {'DPAD_RIGHT'}
+
+
+def test_catches_up_after_stall_without_drift():
+    gamepad, engine = make_engine()
+    engine.update(100.0)
+    # Stalled for 1.2s: right and down are over, left ends at 101.5
+    engine.update(101.2)
+    assert gamepad.held == {'DPAD_LEFT'}
+    engine.update(101.49)
+    assert gamepad.held == {'DPAD_LEFT'}
+    engine.update(101.5)
+    assert gamepad.held == {'DPAD_UP'}
+
+
+def test_halt_releases_and_ignores_updates_until_resume():
+    gamepad, engine = make_engine()
+    engine.update(100.0)
+    engine.update(100.6)
+    engine.halt()
+    assert gamepad.held == set()
+
+    engine.update(100.7)
+    engine.update(105.0)
+    assert gamepad.held == set()
+
+    engine.resume()
+    engine.update(106.0)
+    assert gamepad.held == {'DPAD_RIGHT'}
+    assert held_sequence(gamepad)[-2:] == [('release', 'DPAD_DOWN'), ('press', 'DPAD_RIGHT')]
+
+
+def test_parse_patterns():
+    assert parse_pattern('back_and_forth', 3) == [('right', 3), ('left', 3)]
+    assert parse_pattern('square', 1) == [('right', 1), ('down', 1), ('left', 1), ('up', 1)]
+    assert custom_path('right:5, down:2,left') == [('right', 5), ('down', 2), ('left', 1)]
+
+
+@pytest.mark.parametrize('spec', ['sqaure', 'right:0', 'right:x', 'diagonal:2', ''])
+def test_rejects_bad_patterns(spec):
+    with pytest.raises(ValueError):
+        parse_pattern(spec)
@@ -0,0 +1,83 @@
+import numpy as np
+from session_recorder import SessionRecorder, load_session
+
+
+def make_recorder(tmp_path):
+    # 3 one-second segments at 100 Hz: a 300-frame window
+    return SessionRecorder(tmp_path, sample_rate=100, window_seconds=3,
+                           segment_seconds=1, flush_interval=60)
+
+
+def write_ramp(recorder, start, frames):
+    # Each sample holds its absolute position, so reloaded audio is checkable
+    mono = np.arange(start, start + frames, dtype=np.float32)
+    recorder.write(np.repeat(mono[:, None], 2, axis=1))
+
+
+def write_blocks(recorder, blocks, block_frames=70):
+    for i in range(blocks):
+        write_ramp(recorder, i * block_frames, block_frames)
+        recorder.annotate('bpm', block=i)
+
+
+def test_segments_are_preallocated(tmp_path):
+    recorder = make_recorder(tmp_path)
+    for i in range(recorder.num_segments):
+        stat = (recorder.directory / recorder.segment_name(i)).stat()
+        assert stat.st_size == recorder.segment_frames * 4
+        if hasattr(stat, 'st_blocks'):
+            assert stat.st_blocks * 512 >= stat.st_size
+
+
+def test_wrapped_window_reloads_in_order(tmp_path):
+    recorder = make_recorder(tmp_path)
+    recorder.start()
+    write_blocks(recorder, 7)  # 490 frames, so the first 200 were recycled
+    recorder.close()
+
+    # The segment holding 200-299 is next to be recycled and left out
+    audio, events, sample_rate = load_session(recorder.directory)
+    assert sample_rate == 100
+    np.testing.assert_array_equal(audio, np.arange(300, 490, dtype=np.float32))
+
+    # Events before the oldest listed segment are pruned, the rest rebased
+    assert [e['block'] for e in events] == [4, 5, 6]
+    for event in events:
+        expected = 70 * (event['block'] + 1) - 300
+        assert expected <= event['sample'] <= expected + 5
+
+
+def test_stale_index_never_points_at_overwritten_audio(tmp_path):
+    recorder = make_recorder(tmp_path)  # Writer not started: flushes are manual
+    write_ramp(recorder, 0, 250)
+    recorder.flush()
+
+    # Killed before the next flush, after the oldest segment was recycled
+    write_ramp(recorder, 250, 100)
+
+    audio, _, _ = load_session(recorder.directory)
+    np.testing.assert_array_equal(audio, np.arange(100, 250, dtype=np.float32))
+
+
+def test_restart_keeps_previous_session(tmp_path):
+    first = make_recorder(tmp_path)
+    first.start()
+    write_blocks(first, 2)
+    first.close()
+
+    # Started within the same second as the first session
+    second = make_recorder(tmp_path)
+    assert second.directory != first.directory
+    second.start()
+    write_ramp(second, 1000, 50)
+    second.close()
+
+    audio, _, _ = load_session(first.directory)
+    np.testing.assert_array_equal(audio, np.arange(0, 140, dtype=np.float32))
+    audio, _, _ = load_session(second.directory)
+    np.testing.assert_array_equal(audio, np.arange(1000, 1050, dtype=np.float32))
+
+
+def test_session_directories_are_unique_within_a_second(tmp_path):
+    recorders = [make_recorder(tmp_path) for _ in range(3)]
+    assert len({r.directory for r in recorders}) == 3